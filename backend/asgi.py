@@ -0,0 +1,258 @@
+"""
+Nutrix AI Backend Server (ASGI)
+-------------------------------
+Varian ASGI dari main.py dengan kontrak JSON yang sama untuk /api/analyze.
+
+Perbedaan dengan versi Flask:
+1. Upload multipart di-parse secara streaming (file besar di-spool ke disk,
+   bukan ditampung utuh di memori) tanpa memblokir worker
+2. Panggilan Gemini (termasuk stream) dijalankan di threadpool anyio sehingga
+   event loop tetap melayani request lain selama menunggu upstream. Setiap
+   panggilan yang sedang menunggu memakai satu thread; jumlahnya dibatasi
+   GEMINI_THREADS (default 128, bawaan anyio hanya 40). Request di atas batas
+   itu mengantre, jadi naikkan nilainya jika concurrency upstream lebih tinggi
+3. Encoding dan pencarian similarity Nutrix dijalankan di thread pool
+   terpisah (ukuran diatur dengan NUTRIX_THREADS, default jumlah CPU);
+   deteksi gambar lewat Gemini tidak memakai thread pool ini
+4. Request identik yang bersamaan digabung dengan AsyncSingleFlight
+
+Menjalankan server:
+    uvicorn asgi:app --port 5000 --workers 2
+"""
+
+import asyncio
+import base64
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import partial
+import anyio.to_thread
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+from model.prompts import create_food_analysis_prompt
+from model.gemini.main import analyze_with_gemini, detect_food_from_image, stream_with_gemini
+from model.gemini.cache import normalize_query, response_cache
+from model.nutrix.main import analyze_with_nutrix, nutrition_response
+from model.handlers import SSE_HEADERS, analyze_gemini_text, sse_stream
+from model.singleflight import AsyncSingleFlight
+import profiling
+
+# Thread pool khusus pekerjaan CPU-bound (encoding dan similarity)
+cpu_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("NUTRIX_THREADS", str(os.cpu_count() or 1))),
+    thread_name_prefix="nutrix"
+)
+
+# Batas thread anyio untuk panggilan Gemini dan iterasi stream (run_in_threadpool)
+GEMINI_THREADS = int(os.getenv("GEMINI_THREADS", "128"))
+
+inflight = AsyncSingleFlight()
+
+@asynccontextmanager
+async def lifespan(app):
+    """Atur ukuran threadpool anyio saat startup (limiter berlaku per event loop)"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = GEMINI_THREADS
+    yield
+
+async def run_cpu(fn, *args):
+    """Jalankan fungsi CPU-bound di cpu_executor"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(cpu_executor, partial(fn, *args))
+
+async def analyze_nutrix_image(image_data: str) -> str:
+    """
+    Analisis gambar dengan Nutrix: deteksi Gemini (I/O) di threadpool biasa,
+    pencarian dan format nutrisi di cpu_executor
+    """
+    food_name = await run_in_threadpool(detect_food_from_image, image_data)
+    return await run_cpu(nutrition_response, food_name)
+
+def stream_response(chunks) -> StreamingResponse:
+    """Kirim potongan hasil analisis sebagai Server-Sent Events"""
+    return StreamingResponse(sse_stream(chunks), media_type="text/event-stream", headers=SSE_HEADERS)
+
+def error_response(message: str, status_code: int) -> JSONResponse:
+    """Respons error dengan format yang sama seperti versi Flask"""
+    return JSONResponse({"success": False, "error": message}, status_code=status_code)
+
+async def analyze(request: Request):
+    """
+    Endpoint utama untuk analisis makanan (kontrak sama dengan main.py)
+
+    Menerima:
+    - model: string ('gemini' atau 'nutrix')
+    - image: file (opsional)
+    - text: string (opsional)
+    - stream: '1' untuk respons Server-Sent Events (opsional)
+
+    Returns:
+    - JSON response dengan hasil analisis atau error,
+      atau text/event-stream jika stream diminta
+    """
+    try:
+        form = await request.form()
+
+        # Validasi model yang dipilih
+        model_type = form.get("model", "nutrix")
+        if model_type not in ["gemini", "nutrix"]:
+            return error_response("Model tidak valid. Gunakan 'gemini' atau 'nutrix'.", 400)
+        stream = str(form.get("stream", "")).lower() in ("1", "true", "yes")
+
+        image_file = form.get("image")
+
+        # Proses input gambar
+        if isinstance(image_file, UploadFile):
+            # File sudah di-spool oleh parser multipart, baca per blok
+            hasher = hashlib.sha256()
+            blocks = []
+            while True:
+                block = await image_file.read(64 * 1024)
+                if not block:
+                    break
+                hasher.update(block)
+                blocks.append(block)
+            image_base64 = base64.b64encode(b"".join(blocks)).decode("utf-8")
+
+            # Siapkan data gambar untuk model
+            image_data = f"data:{image_file.content_type};base64,{image_base64}"
+
+            # Untuk gambar, gunakan prompt khusus analisis gambar
+            prompt = create_food_analysis_prompt(is_image=True)
+
+            key = ("image", model_type, image_file.content_type, hasher.hexdigest())
+
+            if model_type == "gemini":
+                gemini_image_data = {
+                    "mime_type": image_file.content_type,
+                    "data": image_base64
+                }
+                if stream:
+                    return stream_response(stream_with_gemini(prompt, gemini_image_data))
+                result = await inflight.do(
+                    key, lambda: run_in_threadpool(analyze_with_gemini, prompt, gemini_image_data)
+                )
+            else:  # nutrix
+                result = await inflight.do(key, lambda: analyze_nutrix_image(image_data))
+
+        # Proses input teks
+        elif "text" in form:
+            text = str(form["text"]).strip()
+            key = ("text", model_type, normalize_query(text))
+
+            if model_type == "nutrix":
+                result = await inflight.do(key, lambda: run_cpu(analyze_with_nutrix, text))
+            else:
+                # Lookup cache melakukan encoding, jalankan di cpu_executor
+                result, embedding = await run_cpu(response_cache.lookup, text)
+                if not result:
+                    prompt = create_food_analysis_prompt(text, is_image=False)
+                    if stream:
+                        return stream_response(
+                            response_cache.collect(text, stream_with_gemini(prompt), embedding)
+                        )
+                    result = await inflight.do(
+                        key, lambda: run_in_threadpool(analyze_gemini_text, text, prompt, embedding)
+                    )
+
+        else:
+            return error_response("Mohon masukkan gambar atau teks untuk dianalisis", 400)
+
+        # Validasi hasil analisis
+        if not result:
+            raise ValueError("Tidak ada respons dari model")
+
+        if stream:
+            return stream_response([result])
+
+        return JSONResponse({
+            "success": True,
+            "data": {"content": result}
+        })
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return error_response(f"Terjadi kesalahan pada server: {str(e)}", 500)
+
+async def stats(request: Request):
+    """Statistik runtime worker (sama seperti /api/stats versi Flask)"""
+    return JSONResponse({
+        "success": True,
+        "data": {
+            "coalescing": inflight.stats(),
+            "cache": response_cache.stats()
+        }
+    })
+
+def admin_error(request: Request):
+    """Cek token admin dari header X-Admin-Token, kembalikan respons error jika gagal"""
+    error = profiling.check_admin_token(request.headers.get("X-Admin-Token"))
+    if error:
+        return error_response(*error)
+    return None
+
+async def admin_memory(request: Request):
+    """Laporan memori worker (sama seperti versi Flask)"""
+    error = admin_error(request)
+    if error:
+        return error
+    return JSONResponse({
+        "success": True,
+        "data": profiling.memory_report({"coalescing": inflight.stats()})
+    })
+
+async def admin_profile(request: Request):
+    """Profil CPU sampling, dijalankan di threadpool agar event loop ikut tersampel"""
+    error = admin_error(request)
+    if error:
+        return error
+    seconds = profiling.clamp_seconds(request.query_params.get("seconds"), 10)
+    try:
+        interval = profiling.parse_interval(request.query_params.get("interval_ms"))
+    except ValueError as e:
+        return error_response(str(e), 400)
+    try:
+        folded = await run_in_threadpool(
+            profiling.sample_cpu, seconds, interval, request.query_params.get("idle") == "1"
+        )
+    except profiling.ProfilerBusy as e:
+        return error_response(str(e), 409)
+    return PlainTextResponse(folded, headers={
+        "Content-Disposition": f"attachment; filename=profile-{os.getpid()}.folded"
+    })
+
+async def admin_tracemalloc(request: Request):
+    """Snapshot tracemalloc (sama seperti versi Flask)"""
+    error = admin_error(request)
+    if error:
+        return error
+    seconds = profiling.clamp_seconds(request.query_params.get("seconds"), 5)
+    try:
+        limit = profiling.parse_limit(request.query_params.get("limit"))
+    except ValueError as e:
+        return error_response(str(e), 400)
+    try:
+        data = await run_in_threadpool(profiling.tracemalloc_snapshot, seconds, limit)
+    except profiling.ProfilerBusy as e:
+        return error_response(str(e), 409)
+    return JSONResponse({"success": True, "data": data})
+
+app = Starlette(
+    routes=[
+        Route("/api/analyze", analyze, methods=["POST"]),
+        Route("/api/stats", stats, methods=["GET"]),
+        Route("/api/admin/memory", admin_memory, methods=["GET"]),
+        Route("/api/admin/profile", admin_profile, methods=["GET"]),
+        Route("/api/admin/tracemalloc", admin_tracemalloc, methods=["GET"]),
+    ],
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+    ],
+    lifespan=lifespan,
+)
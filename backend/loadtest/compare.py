@@ -0,0 +1,94 @@
+"""
+Benchmark Flask vs ASGI
+-----------------------
+Memutar traffic yang sama ke backend Flask (main.py) dan ASGI (asgi.py) pada
+beberapa tingkat concurrency, lalu membandingkan throughput, latensi p50/p99
+dan error rate.
+
+Persiapan (sebaiknya dengan mock Gemini agar latensi upstream terkontrol):
+    python loadtest/mock_gemini.py --port 8089 --latency-ms 800
+    GEMINI_CACHE_ENABLED=0 GEMINI_API_KEY=dummy GEMINI_API_ENDPOINT=http://127.0.0.1:8089 python main.py
+    GEMINI_CACHE_ENABLED=0 GEMINI_API_KEY=dummy GEMINI_API_ENDPOINT=http://127.0.0.1:8089 \
+        uvicorn asgi:app --port 5001
+
+Cache respons Gemini harus dinonaktifkan (GEMINI_CACHE_ENABLED=0): kedua
+server memakai file cache yang sama secara default, sehingga server yang
+jalan belakangan akan mendapat cache hit dari putaran server lain. Urutan
+server juga dibalik pada setiap tingkat concurrency. Kolom hits dan collapsed
+adalah selisih /api/stats selama putaran (cache hit dan request yang digabung);
+jalankan server dengan satu worker agar angkanya mencakup semua request.
+
+Contoh:
+    python loadtest/compare.py --flask-url http://127.0.0.1:5000 --asgi-url http://127.0.0.1:5001 \\
+        --concurrency 1 8 32 64 --requests 300 --image samples/ayam.jpg
+"""
+
+import argparse
+import json
+import sys
+import urllib.request
+from replay import load_traffic, run, summarize, synthesize_traffic
+
+def fetch_stats(url: str, timeout: float) -> dict:
+    """Ambil statistik runtime dari /api/stats"""
+    with urllib.request.urlopen(url.rstrip("/") + "/api/stats", timeout=timeout) as response:
+        return json.loads(response.read())["data"]
+
+def main():
+    parser = argparse.ArgumentParser(description="Bandingkan backend Flask dan ASGI")
+    parser.add_argument("--flask-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--asgi-url", default="http://127.0.0.1:5001")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--traffic", help="File JSONL berisi request yang akan diputar ulang")
+    parser.add_argument("--requests", type=int, default=200, help="Jumlah request sintetis per putaran")
+    parser.add_argument("--gemini-share", type=float, default=0.5)
+    parser.add_argument("--image-share", type=float, default=0.2)
+    parser.add_argument("--image", action="append", default=[])
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    if args.traffic:
+        traffic = load_traffic(args.traffic)
+    else:
+        traffic = synthesize_traffic(args.requests, args.gemini_share, args.image_share,
+                                     args.image, args.seed)
+
+    targets = [("flask", args.flask_url), ("asgi", args.asgi_url)]
+    for name, url in targets:
+        if fetch_stats(url, args.timeout)["cache"].get("enabled"):
+            sys.exit(f"Cache Gemini di server {name} aktif; jalankan dengan GEMINI_CACHE_ENABLED=0")
+
+    results = []
+    for i, concurrency in enumerate(args.concurrency):
+        # Balik urutan setiap putaran agar tidak ada server yang selalu jalan lebih dulu
+        for name, url in (targets if i % 2 == 0 else targets[::-1]):
+            before = fetch_stats(url, args.timeout)
+            raw, elapsed = run(url, traffic, concurrency, args.timeout)
+            after = fetch_stats(url, args.timeout)
+            overall = summarize(raw, elapsed)["all"]
+            results.append({
+                "server": name,
+                "concurrency": concurrency,
+                **overall,
+                "cache_hits": after["cache"].get("hits", 0) - before["cache"].get("hits", 0),
+                "collapsed": after["coalescing"]["collapsed"] - before["coalescing"]["collapsed"],
+            })
+
+    header = f"{'server':<8}{'conc':>6}{'rps':>9}{'p50':>9}{'p99':>9}{'err%':>8}{'hits':>7}{'collapsed':>11}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        print(
+            f"{row['server']:<8}{row['concurrency']:>6}{row['throughput_rps']:>9.1f}"
+            f"{row['p50_ms']:>9.0f}{row['p99_ms']:>9.0f}{row['error_rate'] * 100:>7.1f}%"
+            f"{row['cache_hits']:>7}{row['collapsed']:>11}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
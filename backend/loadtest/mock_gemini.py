@@ -0,0 +1,194 @@
+"""
+Mock Gemini Server
+------------------
+Server pengganti Gemini API untuk load testing lokal.
+Meniru endpoint REST `generateContent` sehingga backend bisa diarahkan
+ke server ini lewat environment variable GEMINI_API_ENDPOINT.
+
+Features:
+1. Latensi yang bisa dikonfigurasi (rata-rata + jitter)
+2. Error rate yang bisa dikonfigurasi (status HTTP dan pesan ala Gemini)
+3. Respons teks analisis dan deteksi makanan dari gambar
+4. Streaming `streamGenerateContent` (JSON array atau SSE dengan alt=sse)
+
+Contoh:
+    python loadtest/mock_gemini.py --port 8089 --latency-ms 800 --jitter-ms 200 --error-rate 0.02
+
+    GEMINI_API_KEY=dummy GEMINI_API_ENDPOINT=http://127.0.0.1:8089 python main.py
+"""
+
+import argparse
+import json
+import random
+import time
+from flask import Flask, Response, request, jsonify
+
+app = Flask(__name__)
+
+# Konfigurasi default, bisa diubah lewat argumen CLI
+config = {
+    "latency_ms": 500.0,
+    "jitter_ms": 100.0,
+    "error_rate": 0.0,
+    "error_status": 503,
+    "stream_chunks": 8,
+    "chunk_interval_ms": 50.0,
+}
+
+# Nama makanan untuk respons deteksi gambar
+DETECTED_FOODS = ["chicken", "rice", "noodles", "egg", "beef", "tofu", "banana"]
+
+ANALYSIS_TEMPLATE = """# 🍽️ {name}
+
+{name} adalah hidangan yang umum dikonsumsi sehari-hari.
+
+## 🍎 Nutrisi per Porsi
+- Kalori: 350 kkal
+- Protein: 12 g
+- Karbohidrat: 45 g
+- Lemak: 14 g
+
+## 💪 Manfaat untuk Tubuh
+- Sumber energi
+- Membantu pembentukan otot
+- Menjaga rasa kenyang lebih lama
+
+## ⚖️ Porsi Sekali Makan
+Satu porsi sekitar 250 gram."""
+
+ERROR_STATUS_NAMES = {
+    429: "RESOURCE_EXHAUSTED",
+    500: "INTERNAL",
+    503: "UNAVAILABLE",
+    504: "DEADLINE_EXCEEDED",
+}
+
+def simulate_latency():
+    """Tidur selama latensi acak sesuai konfigurasi"""
+    delay = random.gauss(config["latency_ms"], config["jitter_ms"])
+    time.sleep(max(delay, 0) / 1000)
+
+def extract_prompt(body: dict) -> str:
+    """Ambil seluruh teks prompt dari body request generateContent"""
+    texts = []
+    for content in body.get("contents", []):
+        for part in content.get("parts", []):
+            if "text" in part:
+                texts.append(part["text"])
+    return "\n".join(texts)
+
+def build_response_text(prompt: str) -> str:
+    """
+    Buat teks respons berdasarkan jenis prompt
+
+    Prompt deteksi gambar dari Nutrix hanya mengharapkan nama makanan,
+    selain itu kembalikan analisis dengan format create_food_analysis_prompt.
+    """
+    if "food detection AI" in prompt:
+        return random.choice(DETECTED_FOODS)
+    return ANALYSIS_TEMPLATE.format(name="Makanan Contoh")
+
+def candidate(text: str) -> dict:
+    """Format satu kandidat respons seperti Gemini REST API"""
+    return {
+        "candidates": [
+            {
+                "content": {"parts": [{"text": text}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0,
+                "safetyRatings": []
+            }
+        ],
+        "promptFeedback": {"safetyRatings": []}
+    }
+
+def error_response():
+    """Respons error dengan format Gemini REST API"""
+    status = config["error_status"]
+    return jsonify({
+        "error": {
+            "code": status,
+            "message": "Mock Gemini: simulated upstream error",
+            "status": ERROR_STATUS_NAMES.get(status, "UNKNOWN")
+        }
+    }), status
+
+@app.route("/<version>/models/<model_name>:generateContent", methods=["POST"])
+def generate_content(version, model_name):
+    """Endpoint pengganti models/{model}:generateContent"""
+    simulate_latency()
+    if random.random() < config["error_rate"]:
+        return error_response()
+
+    prompt = extract_prompt(request.get_json(silent=True) or {})
+    return jsonify(candidate(build_response_text(prompt)))
+
+def split_chunks(text: str, count: int) -> list:
+    """Bagi teks menjadi beberapa potongan dengan ukuran kurang lebih sama"""
+    size = max(1, -(-len(text) // max(count, 1)))
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+@app.route("/<version>/models/<model_name>:streamGenerateContent", methods=["POST"])
+def stream_generate_content(version, model_name):
+    """
+    Endpoint pengganti models/{model}:streamGenerateContent
+
+    Latensi awal mensimulasikan time-to-first-byte, lalu setiap potongan
+    dikirim dengan jeda chunk_interval_ms. Format default adalah JSON array
+    (dipakai transport REST SDK), atau SSE jika alt=sse.
+    """
+    simulate_latency()
+    if random.random() < config["error_rate"]:
+        return error_response()
+
+    prompt = extract_prompt(request.get_json(silent=True) or {})
+    chunks = split_chunks(build_response_text(prompt), config["stream_chunks"])
+    use_sse = request.args.get("alt") == "sse"
+
+    def generate():
+        if not use_sse:
+            yield "["
+        for i, chunk in enumerate(chunks):
+            if i:
+                time.sleep(config["chunk_interval_ms"] / 1000)
+            payload = json.dumps(candidate(chunk))
+            if use_sse:
+                yield f"data: {payload}\r\n\r\n"
+            else:
+                yield ("," if i else "") + payload
+        if not use_sse:
+            yield "]"
+
+    mimetype = "text/event-stream" if use_sse else "application/json"
+    return Response(generate(), mimetype=mimetype)
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Gemini API server untuk load testing")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=config["latency_ms"],
+                        help="Rata-rata latensi per request (ms)")
+    parser.add_argument("--jitter-ms", type=float, default=config["jitter_ms"],
+                        help="Standar deviasi latensi (ms)")
+    parser.add_argument("--error-rate", type=float, default=config["error_rate"],
+                        help="Proporsi request yang gagal (0.0 - 1.0)")
+    parser.add_argument("--error-status", type=int, default=config["error_status"],
+                        help="Status HTTP untuk request yang gagal")
+    parser.add_argument("--stream-chunks", type=int, default=config["stream_chunks"],
+                        help="Jumlah potongan respons pada mode streaming")
+    parser.add_argument("--chunk-interval-ms", type=float, default=config["chunk_interval_ms"],
+                        help="Jeda antar potongan pada mode streaming (ms)")
+    args = parser.parse_args()
+
+    config.update(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        stream_chunks=args.stream_chunks,
+        chunk_interval_ms=args.chunk_interval_ms,
+    )
+    app.run(host=args.host, port=args.port, threaded=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Load Generator / Traffic Replay
+-------------------------------
+Memutar ulang campuran request teks dan gambar ke /api/analyze dengan
+concurrency yang terkontrol, lalu melaporkan throughput, persentil latensi
+dan error rate untuk setiap kombinasi model (gemini/nutrix) dan jenis input
+(text/image). Dengan --stream, request dikirim dalam mode SSE dan
+time-to-first-byte (event pertama) ikut dilaporkan.
+
+Sumber traffic:
+1. File JSONL (--traffic), satu request per baris:
+   {"model": "gemini", "text": "nasi goreng"}
+   {"model": "nutrix", "image": "samples/ayam.jpg"}
+2. Campuran sintetis dari daftar makanan bawaan dan file gambar (--image)
+
+Contoh:
+    python loadtest/replay.py --url http://127.0.0.1:5000 --concurrency 16 --requests 500 \\
+        --gemini-share 0.5 --image-share 0.2 --image samples/ayam.jpg
+"""
+
+import argparse
+import json
+import math
+import mimetypes
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+# Daftar makanan untuk traffic sintetis
+SAMPLE_FOODS = [
+    "nasi goreng", "mie goreng", "ayam goreng", "sate ayam", "rendang",
+    "soto ayam", "gado-gado", "bakso", "tahu goreng", "tempe goreng",
+    "telur rebus", "bubur ayam", "pisang", "apel", "susu",
+    "roti bakar", "ikan bakar", "udang goreng", "sayur bayam", "kentang rebus",
+]
+
+def load_traffic(path: str) -> List[Dict]:
+    """Baca file traffic JSONL"""
+    traffic = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                traffic.append(json.loads(line))
+    return traffic
+
+def synthesize_traffic(count: int, gemini_share: float, image_share: float,
+                       images: List[str], seed: int) -> List[Dict]:
+    """Buat campuran request acak sesuai proporsi model dan jenis input"""
+    rng = random.Random(seed)
+    traffic = []
+    for _ in range(count):
+        entry = {"model": "gemini" if rng.random() < gemini_share else "nutrix"}
+        if images and rng.random() < image_share:
+            entry["image"] = rng.choice(images)
+        else:
+            entry["text"] = rng.choice(SAMPLE_FOODS)
+        traffic.append(entry)
+    return traffic
+
+def encode_multipart(fields: Dict[str, str], files: Dict[str, Tuple[str, bytes, str]]) -> Tuple[bytes, str]:
+    """Encode form field dan file ke body multipart/form-data"""
+    boundary = uuid.uuid4().hex
+    lines = []
+    for name, value in fields.items():
+        lines.append(f"--{boundary}\r\n".encode())
+        lines.append(f'Content-Disposition: form-data; name="{name}"\r\n\r\n'.encode())
+        lines.append(f"{value}\r\n".encode())
+    for name, (filename, data, content_type) in files.items():
+        lines.append(f"--{boundary}\r\n".encode())
+        lines.append(f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'.encode())
+        lines.append(f"Content-Type: {content_type}\r\n\r\n".encode())
+        lines.append(data)
+        lines.append(b"\r\n")
+    lines.append(f"--{boundary}--\r\n".encode())
+    return b"".join(lines), f"multipart/form-data; boundary={boundary}"
+
+class ImageCache:
+    """Cache isi file gambar agar disk I/O tidak ikut terukur"""
+
+    def __init__(self):
+        self._files = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> Tuple[str, bytes, str]:
+        with self._lock:
+            if path not in self._files:
+                with open(path, "rb") as f:
+                    data = f.read()
+                content_type = mimetypes.guess_type(path)[0] or "image/jpeg"
+                self._files[path] = (os.path.basename(path), data, content_type)
+            return self._files[path]
+
+Result = Tuple[str, float, Optional[float], Optional[str]]
+
+def read_event_stream(response) -> Tuple[Optional[float], Optional[str]]:
+    """
+    Baca respons SSE sampai selesai
+
+    Returns:
+        Tuple (waktu event pertama dari perf_counter, pesan error atau None)
+    """
+    first_event = None
+    event = None
+    for raw_line in response:
+        line = raw_line.decode("utf-8").rstrip("\r\n")
+        if line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            if first_event is None:
+                first_event = time.perf_counter()
+            if event == "error":
+                return first_event, json.loads(line[len("data:"):]).get("error", "stream error")
+            if event == "done":
+                return first_event, None
+        elif not line:
+            event = None
+    return first_event, "stream terputus sebelum event done"
+
+def build_request(url: str, entry: Dict, images: ImageCache, stream: bool) -> urllib.request.Request:
+    """Susun request multipart /api/analyze dari satu entri traffic"""
+    fields = {"model": entry.get("model", "nutrix")}
+    files = {}
+    if "image" in entry:
+        files["image"] = images.get(entry["image"])
+    else:
+        fields["text"] = entry["text"]
+    if stream:
+        fields["stream"] = "1"
+    body, content_type = encode_multipart(fields, files)
+
+    return urllib.request.Request(
+        f"{url.rstrip('/')}/api/analyze",
+        data=body,
+        headers={"Content-Type": content_type},
+        method="POST",
+    )
+
+def send_request(url: str, entry: Dict, images: ImageCache, timeout: float,
+                 stream: bool = False) -> Result:
+    """
+    Kirim satu request ke /api/analyze
+
+    Entri yang tidak valid (file gambar tidak ada, field text kosong) dicatat
+    sebagai error pada grup model/input-nya.
+
+    Returns:
+        Tuple (key, latensi detik, TTFB detik atau None, pesan error atau None)
+    """
+    input_type = "image" if "image" in entry else "text"
+    key = f"{entry.get('model', 'nutrix')}/{input_type}"
+
+    start = time.perf_counter()
+    first_byte = None
+    error = None
+    try:
+        req = build_request(url, entry, images, stream)
+        start = time.perf_counter()
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            if "text/event-stream" in response.headers.get("Content-Type", ""):
+                first_byte, error = read_event_stream(response)
+            else:
+                payload = json.loads(response.read())
+                if not payload.get("success"):
+                    error = payload.get("error", "success=false")
+    except urllib.error.HTTPError as e:
+        error = f"HTTP {e.code}"
+    except Exception as e:
+        error = type(e).__name__
+    end = time.perf_counter()
+    ttfb = first_byte - start if first_byte is not None else None
+    return key, end - start, ttfb, error
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Persentil dengan metode nearest-rank"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarize(results: List[Result], elapsed: float) -> Dict[str, Dict]:
+    """
+    Kelompokkan hasil per model/input dan hitung statistiknya
+
+    Grup "all" selalu ada, juga jika tidak ada hasil sama sekali.
+    """
+    groups: Dict[str, List[Tuple[float, Optional[float], Optional[str]]]] = {"all": []}
+    for key, latency, ttfb, error in results:
+        groups.setdefault(key, []).append((latency, ttfb, error))
+        groups.setdefault("all", []).append((latency, ttfb, error))
+
+    summary = {}
+    for key, items in sorted(groups.items()):
+        latencies = sorted(latency * 1000 for latency, _, _ in items)
+        ttfbs = sorted(ttfb * 1000 for _, ttfb, _ in items if ttfb is not None)
+        errors = [error for _, _, error in items if error]
+        summary[key] = {
+            "requests": len(items),
+            "errors": len(errors),
+            "error_rate": len(errors) / len(items) if items else 0.0,
+            "throughput_rps": len(items) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 50),
+            "p90_ms": percentile(latencies, 90),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": latencies[-1] if latencies else 0.0,
+            "ttfb_p50_ms": percentile(ttfbs, 50) if ttfbs else None,
+            "ttfb_p90_ms": percentile(ttfbs, 90) if ttfbs else None,
+            "top_errors": sorted(set(errors))[:5],
+        }
+    return summary
+
+def print_summary(summary: Dict[str, Dict], elapsed: float, concurrency: int):
+    """Cetak ringkasan dalam bentuk tabel"""
+    print(f"\nDurasi: {elapsed:.1f}s, concurrency: {concurrency}")
+    header = f"{'model/input':<16}{'req':>7}{'err%':>8}{'rps':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}"
+    print(header)
+    print("-" * len(header))
+    for key, stats in summary.items():
+        print(
+            f"{key:<16}{stats['requests']:>7}{stats['error_rate'] * 100:>7.1f}%"
+            f"{stats['throughput_rps']:>9.1f}{stats['p50_ms']:>9.0f}{stats['p90_ms']:>9.0f}"
+            f"{stats['p99_ms']:>9.0f}{stats['max_ms']:>9.0f}"
+        )
+    if any(stats["ttfb_p50_ms"] is not None for stats in summary.values()):
+        print(f"\n{'model/input':<16}{'ttfb p50':>10}{'ttfb p90':>10}")
+        for key, stats in summary.items():
+            if stats["ttfb_p50_ms"] is not None:
+                print(f"{key:<16}{stats['ttfb_p50_ms']:>10.0f}{stats['ttfb_p90_ms']:>10.0f}")
+    for key, stats in summary.items():
+        if key != "all" and stats["top_errors"]:
+            print(f"Error {key}: {', '.join(stats['top_errors'])}")
+
+def run(url: str, traffic: List[Dict], concurrency: int, timeout: float,
+        duration: Optional[float] = None, stream: bool = False) -> Tuple[List[Result], float]:
+    """
+    Jalankan traffic dengan jumlah worker tetap (closed loop)
+
+    Jika duration diberikan, traffic diputar berulang sampai waktu habis.
+    """
+    images = ImageCache()
+    results = []
+    lock = threading.Lock()
+    position = [0]
+    start = time.perf_counter()
+
+    def next_entry() -> Optional[Dict]:
+        with lock:
+            index = position[0]
+            if duration is None and index >= len(traffic):
+                return None
+            if duration is not None and time.perf_counter() - start >= duration:
+                return None
+            position[0] += 1
+            return traffic[index % len(traffic)]
+
+    def worker():
+        while True:
+            entry = next_entry()
+            if entry is None:
+                return
+            result = send_request(url, entry, images, timeout, stream)
+            with lock:
+                results.append(result)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(worker) for _ in range(concurrency)]
+        # Teruskan exception dari worker agar tidak hilang tanpa pesan
+        for future in futures:
+            future.result()
+
+    return results, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay traffic ke /api/analyze")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Base URL backend")
+    parser.add_argument("--traffic", help="File JSONL berisi request yang akan diputar ulang")
+    parser.add_argument("--requests", type=int, default=200, help="Jumlah request sintetis")
+    parser.add_argument("--duration", type=float, help="Putar traffic berulang selama N detik")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--gemini-share", type=float, default=0.5, help="Proporsi request model gemini")
+    parser.add_argument("--image-share", type=float, default=0.2, help="Proporsi request gambar")
+    parser.add_argument("--image", action="append", default=[], help="File gambar (bisa diulang)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--stream", action="store_true", help="Gunakan mode SSE (stream=1)")
+    parser.add_argument("--json", help="Simpan ringkasan ke file JSON")
+    args = parser.parse_args()
+
+    if args.traffic:
+        traffic = load_traffic(args.traffic)
+    else:
+        traffic = synthesize_traffic(args.requests, args.gemini_share, args.image_share,
+                                     args.image, args.seed)
+    if not traffic:
+        parser.error("Traffic kosong")
+
+    results, elapsed = run(args.url, traffic, args.concurrency, args.timeout, args.duration, args.stream)
+    summary = summarize(results, elapsed)
+    print_summary(summary, elapsed, args.concurrency)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"elapsed_s": elapsed, "concurrency": args.concurrency, "groups": summary}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -10,20 +10,46 @@ Flow:
 1. Terima request dari frontend (gambar/teks)
 2. Jika gambar, gunakan Gemini untuk deteksi nama makanan
 3. Gunakan Nutrix untuk analisis nutrisi
+   (analisis teks Gemini memakai semantic cache, lihat model/gemini/cache.py)
 4. Kembalikan hasil analisis ke frontend
+
+Request identik yang berjalan bersamaan (teks ternormalisasi atau hash gambar,
+per model) digabung menjadi satu komputasi, lihat model/singleflight.py.
+
+Jika request menyertakan stream=1, hasil dikirim sebagai Server-Sent Events
+(Gemini di-stream per potongan, Nutrix dikirim sebagai satu event).
 """
 
 import base64
-from flask import Flask, request, jsonify
+import hashlib
+import os
+from typing import Iterable
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 from model.prompts import create_food_analysis_prompt
-from model.gemini.main import analyze_with_gemini, detect_food_from_image
+from model.gemini.main import analyze_with_gemini, stream_with_gemini, detect_food_from_image
+from model.gemini.cache import normalize_query, response_cache
 from model.nutrix.main import analyze_with_nutrix
+from model.handlers import SSE_HEADERS, analyze_gemini_text, sse_stream
+from model.singleflight import inflight
+import profiling
 
 # Inisialisasi Flask app dengan CORS
 app = Flask(__name__)
 CORS(app)
 
+def wants_stream() -> bool:
+    """Cek apakah client meminta respons streaming (SSE)"""
+    return request.form.get("stream", "").lower() in ("1", "true", "yes")
+
+def stream_response(chunks: Iterable[str]) -> Response:
+    """Kirim potongan hasil analisis sebagai Server-Sent Events"""
+    return Response(
+        stream_with_context(sse_stream(chunks)),
+        mimetype="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
 @app.route("/api/analyze", methods=["POST"])
 def analyze():
     """
@@ -33,9 +59,11 @@ def analyze():
     - model: string ('gemini' atau 'nutrix')
     - image: file (opsional)
     - text: string (opsional)
+    - stream: '1' untuk respons Server-Sent Events (opsional)
     
     Returns:
-    - JSON response dengan hasil analisis atau error
+    - JSON response dengan hasil analisis atau error,
+      atau text/event-stream jika stream diminta
     """
     try:
         # Validasi model yang dipilih
@@ -45,6 +73,7 @@ def analyze():
                 "success": False,
                 "error": "Model tidak valid. Gunakan 'gemini' atau 'nutrix'."
             }), 400
+        stream = wants_stream()
 
         # Proses input gambar
         if "image" in request.files:
@@ -59,6 +88,9 @@ def analyze():
             # Untuk gambar, gunakan prompt khusus analisis gambar
             prompt = create_food_analysis_prompt(is_image=True)
             
+            # Request dengan gambar yang sama digabung berdasarkan hash isinya
+            key = ("image", model_type, image_file.content_type, hashlib.sha256(image_bytes).hexdigest())
+
             # Analisis dengan model yang dipilih
             if model_type == "gemini":
                 # Format data untuk Gemini
@@ -66,21 +98,31 @@ def analyze():
                     "mime_type": image_file.content_type,
                     "data": image_base64
                 }
-                result = analyze_with_gemini(prompt, gemini_image_data)
+                if stream:
+                    return stream_response(stream_with_gemini(prompt, gemini_image_data))
+                result = inflight.do(key, lambda: analyze_with_gemini(prompt, gemini_image_data))
             else:  # nutrix 
-                result = analyze_with_nutrix(prompt, image_data)
+                result = inflight.do(key, lambda: analyze_with_nutrix(prompt, image_data))
 
         # Proses input teks
         elif "text" in request.form:
             text = request.form["text"].strip()
+            key = ("text", model_type, normalize_query(text))
             
             # Jika menggunakan Nutrix, langsung gunakan teks sebagai nama makanan
             if model_type == "nutrix":
-                result = analyze_with_nutrix(text)
+                result = inflight.do(key, lambda: analyze_with_nutrix(text))
             else:
-                # Untuk Gemini, buat prompt lengkap untuk analisis
-                prompt = create_food_analysis_prompt(text, is_image=False)
-                result = analyze_with_gemini(prompt)
+                # Gunakan respons tersimpan untuk query yang sama/mirip
+                result, embedding = response_cache.lookup(text)
+                if not result:
+                    # Untuk Gemini, buat prompt lengkap untuk analisis
+                    prompt = create_food_analysis_prompt(text, is_image=False)
+                    if stream:
+                        return stream_response(
+                            response_cache.collect(text, stream_with_gemini(prompt), embedding)
+                        )
+                    result = inflight.do(key, lambda: analyze_gemini_text(text, prompt, embedding))
 
         else:
             return jsonify({
@@ -92,6 +134,9 @@ def analyze():
         if not result:
             raise ValueError("Tidak ada respons dari model")
 
+        if stream:
+            return stream_response([result])
+
         return jsonify({
             "success": True,
             "data": {"content": result}
@@ -104,5 +149,89 @@ def analyze():
             "error": f"Terjadi kesalahan pada server: {str(e)}"
         }), 500
 
+@app.route("/api/stats", methods=["GET"])
+def stats():
+    """
+    Statistik runtime worker
+
+    Returns:
+    - JSON berisi counter coalescing (termasuk jumlah request duplikat
+      yang digabung) dan statistik cache respons Gemini
+    """
+    return jsonify({
+        "success": True,
+        "data": {
+            "coalescing": inflight.stats(),
+            "cache": response_cache.stats()
+        }
+    })
+
+def admin_error():
+    """Cek token admin dari header X-Admin-Token, kembalikan respons error jika gagal"""
+    error = profiling.check_admin_token(request.headers.get("X-Admin-Token"))
+    if error:
+        message, status = error
+        return jsonify({"success": False, "error": message}), status
+    return None
+
+@app.route("/api/admin/memory", methods=["GET"])
+def admin_memory():
+    """
+    Laporan memori worker: model, food_embeddings, df, cache dan RSS proses
+
+    Header:
+    - X-Admin-Token: token sesuai ADMIN_TOKEN
+    """
+    error = admin_error()
+    if error:
+        return error
+    return jsonify({
+        "success": True,
+        "data": profiling.memory_report({"coalescing": inflight.stats()})
+    })
+
+@app.route("/api/admin/profile", methods=["GET"])
+def admin_profile():
+    """
+    Profil CPU sampling selama N detik (?seconds=10&interval_ms=5&idle=0)
+
+    Thread yang sedang menunggu dilewati kecuali idle=1 (profil wall-clock)
+
+    Returns:
+    - File folded stacks (text/plain) untuk flamegraph.pl / speedscope
+    """
+    error = admin_error()
+    if error:
+        return error
+    seconds = profiling.clamp_seconds(request.args.get("seconds"), 10)
+    try:
+        interval = profiling.parse_interval(request.args.get("interval_ms"))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    try:
+        folded = profiling.sample_cpu(seconds, interval, request.args.get("idle") == "1")
+    except profiling.ProfilerBusy as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+    return Response(folded, mimetype="text/plain", headers={
+        "Content-Disposition": f"attachment; filename=profile-{os.getpid()}.folded"
+    })
+
+@app.route("/api/admin/tracemalloc", methods=["GET"])
+def admin_tracemalloc():
+    """Snapshot tracemalloc (?seconds=5&limit=30)"""
+    error = admin_error()
+    if error:
+        return error
+    seconds = profiling.clamp_seconds(request.args.get("seconds"), 5)
+    try:
+        limit = profiling.parse_limit(request.args.get("limit"))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    try:
+        data = profiling.tracemalloc_snapshot(seconds, limit)
+    except profiling.ProfilerBusy as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+    return jsonify({"success": True, "data": data})
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
\ No newline at end of file
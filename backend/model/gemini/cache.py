@@ -0,0 +1,286 @@
+"""
+Semantic Response Cache
+-----------------------
+Cache respons Gemini untuk analisis teks berdasarkan kemiripan semantik query.
+Query seperti "nasi goreng", "Nasi Goreng " dan "nasi goreng enak" dapat
+memakai ulang respons yang sama tanpa memanggil Gemini lagi.
+
+Cara kerja:
+1. Query dinormalisasi (lowercase, spasi dirapikan) untuk pencocokan persis
+2. Jika tidak ada yang persis, query di-encode dengan model MiniLM milik Nutrix
+   dan dibandingkan (cosine similarity) dengan query yang pernah disimpan
+3. Respons dipakai ulang jika similarity >= threshold dan belum kedaluwarsa
+4. Cache disimpan di SQLite lokal dengan eviksi berdasarkan TTL dan jumlah entri (LRU)
+5. Worker lain yang memakai file yang sama melihat entri baru: query persis
+   dicek langsung ke SQLite, dan indeks di memori dimuat ulang jika isi
+   database berubah
+
+Environment:
+- GEMINI_CACHE_ENABLED: '0' untuk menonaktifkan cache (default '1')
+- GEMINI_CACHE_PATH: Lokasi file SQLite (default model/gemini/cache.sqlite3)
+- GEMINI_CACHE_THRESHOLD: Batas similarity (default 0.92)
+- GEMINI_CACHE_TTL: Umur maksimum entri dalam detik (default 7 hari)
+- GEMINI_CACHE_MAX_ENTRIES: Jumlah entri maksimum (default 5000)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Iterator, Optional, Tuple
+import numpy as np
+from ..nutrix import main as nutrix
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cache.sqlite3")
+
+def normalize_query(query: str) -> str:
+    """Lowercase dan rapikan spasi pada query"""
+    return " ".join(query.lower().split())
+
+class SemanticCache:
+    """
+    Cache respons berbasis kemiripan semantik dengan penyimpanan SQLite
+
+    Embedding semua entri disimpan juga di memori (matriks float32 yang sudah
+    dinormalisasi) sehingga pencarian cukup satu perkalian matriks.
+    """
+
+    def __init__(self, path: str, threshold: float = 0.92, ttl: float = 7 * 24 * 3600,
+                 max_entries: int = 5000, enabled: bool = True):
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self._ids = []  # id entri sesuai urutan baris matriks
+        self._queries = {}  # query ternormalisasi -> id
+        self._matrix = None  # Matriks embedding (jumlah entri x dimensi)
+        self._known = None  # (jumlah entri, id terbesar) saat indeks terakhir dimuat
+
+    @classmethod
+    def from_env(cls) -> "SemanticCache":
+        """Buat cache dari environment variables"""
+        return cls(
+            path=os.getenv("GEMINI_CACHE_PATH", DEFAULT_CACHE_PATH),
+            threshold=float(os.getenv("GEMINI_CACHE_THRESHOLD", "0.92")),
+            ttl=float(os.getenv("GEMINI_CACHE_TTL", str(7 * 24 * 3600))),
+            max_entries=int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "5000")),
+            enabled=os.getenv("GEMINI_CACHE_ENABLED", "1") != "0",
+        )
+
+    def _connect(self):
+        """Buka database dan muat embedding ke memori (sekali saja)"""
+        if self._conn is not None:
+            return
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                query TEXT UNIQUE NOT NULL,
+                embedding BLOB NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+        self._evict(time.time())
+        self._reload()
+
+    def _signature(self) -> tuple:
+        """Jumlah entri dan id terbesar di database, untuk mendeteksi perubahan"""
+        return self._conn.execute("SELECT COUNT(*), MAX(id) FROM responses").fetchone()
+
+    def _reload(self):
+        """Bangun ulang indeks di memori dari database"""
+        rows = self._conn.execute("SELECT id, query, embedding FROM responses ORDER BY id").fetchall()
+        self._ids = [row[0] for row in rows]
+        self._queries = {row[1]: row[0] for row in rows}
+        if rows:
+            self._matrix = np.stack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+        else:
+            self._matrix = None
+        self._known = (len(rows), rows[-1][0] if rows else None)
+
+    def _refresh(self):
+        """
+        Muat ulang indeks jika database diubah worker lain
+
+        INSERT OR REPLACE memberi id baru, sehingga entri yang ditambah,
+        diganti atau dihapus selalu mengubah jumlah entri atau id terbesar.
+        """
+        if self._signature() != self._known:
+            self._reload()
+
+    def _evict(self, now: float) -> bool:
+        """
+        Hapus entri kedaluwarsa dan entri yang paling lama tidak diakses
+        jika jumlahnya melebihi max_entries
+
+        Returns:
+            bool: True jika ada entri yang dihapus
+        """
+        deleted = self._conn.execute(
+            "DELETE FROM responses WHERE created_at < ?", (now - self.ttl,)
+        ).rowcount
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            deleted += self._conn.execute(
+                "DELETE FROM responses WHERE id IN "
+                "(SELECT id FROM responses ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,)
+            ).rowcount
+        self._conn.commit()
+        return deleted > 0
+
+    def _encode(self, query: str) -> np.ndarray:
+        """Encode query dengan model sentence-transformer milik Nutrix"""
+        if nutrix.model is None:
+            nutrix.load_model_and_data()
+        return nutrix.model.encode(query, normalize_embeddings=True).astype(np.float32)
+
+    def lookup(self, query: str) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Cari respons untuk query yang sama atau mirip
+
+        Encoding dan perhitungan similarity dilakukan di luar lock sehingga
+        lookup dari beberapa thread bisa berjalan bersamaan. Embedding yang
+        dihitung ikut dikembalikan agar set() tidak perlu encode ulang.
+
+        Args:
+            query: Teks query dari pengguna
+
+        Returns:
+            Tuple[Optional[str], Optional[np.ndarray]]: Respons tersimpan (None
+            jika tidak ada) dan embedding query (None jika tidak di-encode)
+        """
+        if not self.enabled:
+            return None, None
+        normalized = normalize_query(query)
+        if not normalized:
+            return None, None
+
+        embedding = None
+        try:
+            with self._lock:
+                self._connect()
+                entry_id = self._queries.get(normalized)
+                if entry_id is None:
+                    # Entri mungkin baru ditulis worker lain
+                    row = self._conn.execute(
+                        "SELECT id FROM responses WHERE query = ?", (normalized,)
+                    ).fetchone()
+                    if row is not None:
+                        entry_id = row[0]
+                if entry_id is None:
+                    self._refresh()
+                # Matriks tidak pernah diubah di tempat, aman dibaca di luar lock
+                ids, matrix = self._ids, self._matrix
+
+            if entry_id is None and matrix is not None:
+                embedding = self._encode(normalized)
+                scores = matrix @ embedding
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    entry_id = ids[best]
+
+            with self._lock:
+                row = None
+                if entry_id is not None:
+                    row = self._conn.execute(
+                        "SELECT response, created_at FROM responses WHERE id = ?", (entry_id,)
+                    ).fetchone()
+
+                now = time.time()
+                if row is None or now - row[1] > self.ttl:
+                    self.misses += 1
+                    return None, embedding
+
+                self._conn.execute("UPDATE responses SET last_access = ? WHERE id = ?", (now, entry_id))
+                self._conn.commit()
+                self.hits += 1
+                return row[0], embedding
+        except Exception as e:
+            print(f"Cache Error: {str(e)}")
+            return None, embedding
+
+    def set(self, query: str, response: str, embedding: Optional[np.ndarray] = None):
+        """
+        Simpan respons untuk query
+
+        Args:
+            query: Teks query dari pengguna
+            response: Respons Gemini yang akan disimpan
+            embedding: Embedding query dari lookup() (opsional, di-encode jika None)
+        """
+        if not self.enabled or not response:
+            return
+        normalized = normalize_query(query)
+        if not normalized:
+            return
+
+        try:
+            if embedding is None:
+                embedding = self._encode(normalized)
+            with self._lock:
+                self._connect()
+                self._refresh()
+                now = time.time()
+                replaced = normalized in self._queries
+                cursor = self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (query, embedding, response, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (normalized, embedding.tobytes(), response, now, now)
+                )
+                self._conn.commit()
+
+                if self._evict(now) or replaced:
+                    self._reload()
+                else:
+                    # Entri baru cukup ditambahkan ke indeks di memori
+                    self._ids.append(cursor.lastrowid)
+                    self._queries[normalized] = cursor.lastrowid
+                    row = embedding[np.newaxis, :]
+                    self._matrix = row if self._matrix is None else np.vstack([self._matrix, row])
+                    self._known = (len(self._ids), cursor.lastrowid)
+        except Exception as e:
+            print(f"Cache Error: {str(e)}")
+
+    def collect(self, query: str, chunks: Iterable[str],
+                embedding: Optional[np.ndarray] = None) -> Iterator[str]:
+        """
+        Teruskan potongan respons streaming, lalu simpan hasil lengkapnya
+
+        Respons hanya disimpan jika stream selesai tanpa error.
+        """
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        self.set(query, "".join(parts), embedding)
+
+    def memory_usage(self) -> dict:
+        """Ukuran indeks di memori dan file database cache (byte)"""
+        return {
+            "entries": len(self._ids),
+            "matrix_bytes": int(self._matrix.nbytes) if self._matrix is not None else 0,
+            "db_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+        }
+
+    def stats(self) -> dict:
+        """Statistik cache untuk monitoring"""
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._ids),
+            "hits": self.hits,
+            "misses": self.misses,
+            "threshold": self.threshold,
+        }
+
+# Instance cache yang dipakai backend
+response_cache = SemanticCache.from_env()
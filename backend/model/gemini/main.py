@@ -8,6 +8,11 @@ Features:
 1. Analisis teks - Menganalisis deskripsi makanan
 2. Analisis gambar - Menganalisis gambar makanan
 3. Konfigurasi otomatis - Setup API key dan model
+
+Environment:
+- GEMINI_API_KEY: API key Gemini (wajib)
+- GEMINI_API_ENDPOINT: Endpoint alternatif, misalnya mock server lokal
+  untuk load testing (opsional, contoh: http://127.0.0.1:8089)
 """
 
 import os
@@ -16,6 +21,7 @@ import google.generativeai as genai
 from dotenv import load_dotenv
 from PIL import Image
 import io
+from typing import Iterator
 
 # Load environment variables
 load_dotenv()
@@ -25,7 +31,26 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if not GEMINI_API_KEY:
     raise ValueError("GEMINI_API_KEY not found in environment variables")
 
-genai.configure(api_key=GEMINI_API_KEY)
+# Endpoint alternatif (misalnya mock server di loadtest/mock_gemini.py)
+GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT")
+
+def configure_gemini(api_key: str):
+    """
+    Konfigurasi client Gemini dengan API key
+
+    Jika GEMINI_API_ENDPOINT diset, request diarahkan ke endpoint tersebut
+    melalui transport REST agar bisa dilayani oleh server HTTP biasa.
+    """
+    if GEMINI_API_ENDPOINT:
+        genai.configure(
+            api_key=api_key,
+            transport="rest",
+            client_options={"api_endpoint": GEMINI_API_ENDPOINT}
+        )
+    else:
+        genai.configure(api_key=api_key)
+
+configure_gemini(GEMINI_API_KEY)
 
 def init_gemini():
     """
@@ -46,9 +71,31 @@ def init_gemini():
     if not GEMINI_API_KEY:
         raise ValueError("GEMINI_API_KEY is not configured")
     
-    genai.configure(api_key=GEMINI_API_KEY)
+    configure_gemini(GEMINI_API_KEY)
     return genai.GenerativeModel("gemini-2.0-flash")
 
+def build_contents(prompt: str, image_data: dict = None) -> list:
+    """
+    Susun contents request Gemini dari prompt dan gambar (opsional)
+
+    Args:
+        prompt: String prompt untuk analisis
+        image_data: Dict berisi mime_type dan data gambar dalam base64 (opsional)
+
+    Returns:
+        list: Contents untuk generate_content
+    """
+    parts = [{"text": prompt}]
+    if image_data:
+        # Mode analisis gambar
+        parts.append({
+            "inline_data": {
+                "mime_type": image_data["mime_type"],
+                "data": image_data["data"]
+            }
+        })
+    return [{"parts": parts}]
+
 def analyze_with_gemini(prompt: str, image_data: dict = None):
     """
     Analisis makanan menggunakan Gemini AI
@@ -70,41 +117,49 @@ def analyze_with_gemini(prompt: str, image_data: dict = None):
     try:
         # Inisialisasi model
         model = init_gemini()
-        
-        if image_data:
-            # Mode analisis gambar
-            response = model.generate_content(
-                contents=[
-                    {
-                        "parts": [
-                            {"text": prompt},
-                            {
-                                "inline_data": {
-                                    "mime_type": image_data["mime_type"],
-                                    "data": image_data["data"]
-                                }
-                            }
-                        ]
-                    }
-                ]
-            )
-        else:
-            # Mode analisis teks
-            response = model.generate_content(
-                contents=[
-                    {
-                        "parts": [
-                            {"text": prompt}
-                        ]
-                    }
-                ]
-            )
+        response = model.generate_content(contents=build_contents(prompt, image_data))
 
         return response.text if response.text else None
     except Exception as e:
         print(f"Gemini Error: {str(e)}")
         raise
 
+def stream_with_gemini(prompt: str, image_data: dict = None) -> Iterator[str]:
+    """
+    Analisis makanan menggunakan Gemini AI dengan streaming
+
+    Sama seperti analyze_with_gemini, tetapi teks dikembalikan per potongan
+    segera setelah dihasilkan oleh Gemini.
+
+    Args:
+        prompt: String prompt untuk analisis
+        image_data: Dict berisi mime_type dan data gambar dalam base64 (opsional)
+
+    Yields:
+        str: Potongan teks hasil analisis
+
+    Raises:
+        Exception: Jika terjadi error saat analisis
+    """
+    try:
+        model = init_gemini()
+        response = model.generate_content(
+            contents=build_contents(prompt, image_data),
+            stream=True
+        )
+
+        for chunk in response:
+            # Chunk tanpa teks (misalnya hanya metadata) dilewati
+            try:
+                text = chunk.text
+            except ValueError:
+                continue
+            if text:
+                yield text
+    except Exception as e:
+        print(f"Gemini Stream Error: {str(e)}")
+        raise
+
 def detect_food_from_image(image_data: str) -> str:
     """
     Detect food from base64 encoded image using Gemini 
@@ -0,0 +1,49 @@
+"""
+Handler Bersama Backend
+-----------------------
+Helper yang dipakai oleh server Flask (main.py) dan ASGI (asgi.py) sehingga
+keduanya menghasilkan respons yang sama tanpa saling import.
+
+Features:
+1. Server-Sent Events - Format event dan rangkaian event untuk respons streaming
+2. Analisis teks Gemini - Panggilan Gemini yang hasilnya disimpan ke semantic cache
+"""
+
+import json
+from typing import Iterable, Iterator
+from .gemini.main import analyze_with_gemini
+from .gemini.cache import response_cache
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def sse_event(data: dict, event: str = None) -> str:
+    """Format satu event Server-Sent Events"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+def sse_stream(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Ubah potongan hasil analisis menjadi rangkaian Server-Sent Events
+
+    Event:
+    - (default) data: {"content": "<potongan teks>"}
+    - done: analisis selesai
+    - error: data: {"error": "<pesan>"}
+    """
+    try:
+        produced = False
+        for chunk in chunks:
+            produced = True
+            yield sse_event({"content": chunk})
+        if not produced:
+            raise ValueError("Tidak ada respons dari model")
+        yield sse_event({}, event="done")
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        yield sse_event({"error": f"Terjadi kesalahan pada server: {str(e)}"}, event="error")
+
+def analyze_gemini_text(text: str, prompt: str, embedding=None) -> str:
+    """Analisis teks dengan Gemini lalu simpan hasilnya ke cache"""
+    result = analyze_with_gemini(prompt)
+    response_cache.set(text, result, embedding)
+    return result
@@ -0,0 +1,235 @@
+"""
+Bulk Analysis CLI Nutrix
+------------------------
+Analisis nutrisi offline untuk file log makanan berukuran besar (CSV/JSONL)
+tanpa melalui Flask.
+
+Cara kerja:
+1. Input dibaca secara streaming dan dipotong menjadi chunk
+2. Chunk dibagikan ke process pool; setiap worker memuat model Nutrix sekali
+   dan memetakan snapshot (embedding dibagi lewat memory-map, lihat snapshot.py).
+   Jika snapshot belum ada atau usang, snapshot dibangun sekali sebelum pool dimulai
+3. Setiap chunk di-encode dalam batch besar dengan find_closest_foods
+4. Hasil ditulis ke JSONL sesuai urutan input dan di-flush per chunk
+5. Jumlah chunk yang berjalan dibatasi sehingga memori tetap konstan
+
+Karena output selalu berupa prefix dari input, proses yang terhenti bisa
+dilanjutkan dengan --resume: baris output yang sudah lengkap dihitung dan
+input sebanyak itu dilewati.
+
+Contoh:
+    python -m model.nutrix.bulk meals.csv results.jsonl --column food_name --workers 8
+    python -m model.nutrix.bulk meals.jsonl results.jsonl --resume
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+from .snapshot import CSV_PATH, MODEL_NAME, SNAPSHOT_DIR, load_snapshot, main as build_snapshot_main
+
+# Kolom identitas yang tidak dimasukkan ke dict nutrisi
+NDB_COLUMN = "Nutrient Data Bank Number"
+
+def read_records(path: str, input_format: str, field: Optional[str]) -> Iterator[str]:
+    """
+    Baca nama makanan dari file input secara streaming
+
+    Args:
+        path: Lokasi file input
+        input_format: 'csv' atau 'jsonl'
+        field: Nama kolom/field berisi nama makanan
+            (default: 'food_name' jika ada, selain itu kolom pertama untuk CSV)
+
+    Yields:
+        str: Nama makanan (string kosong jika tidak ada)
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if input_format == "csv":
+            reader = csv.DictReader(f)
+            column = field
+            if column is None:
+                names = reader.fieldnames or []
+                column = "food_name" if "food_name" in names else (names[0] if names else None)
+            for row in reader:
+                yield (row.get(column) or "").strip()
+        else:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                value = json.loads(line)
+                if isinstance(value, dict):
+                    value = value.get(field or "food_name")
+                yield str(value or "").strip()
+
+def count_completed(path: str) -> int:
+    """
+    Hitung baris output yang sudah lengkap dan buang baris terakhir yang terpotong
+
+    Returns:
+        int: Jumlah record yang sudah selesai diproses
+    """
+    if not os.path.exists(path):
+        return 0
+    completed = 0
+    valid_size = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            completed += 1
+            valid_size += len(line)
+    if valid_size != os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(valid_size)
+    return completed
+
+def chunked(records: Iterator[str], start: int, size: int) -> Iterator[List[Tuple[int, str]]]:
+    """Potong record menjadi chunk berisi pasangan (indeks, nama)"""
+    index = start
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield [(index + i, name) for i, name in enumerate(chunk)]
+        index += len(chunk)
+
+def ensure_snapshot():
+    """
+    Pastikan snapshot tersedia dan masih sesuai sebelum worker dijalankan
+
+    Tanpa snapshot setiap worker mem-parsing CSV dan meng-encode ulang semua
+    nama makanan ke memorinya sendiri, jadi snapshot dibangun sekali di sini.
+
+    Raises:
+        SystemExit: Jika snapshot gagal dibangun
+    """
+    if load_snapshot(SNAPSHOT_DIR, CSV_PATH, MODEL_NAME) is not None:
+        return
+    print(f"Membangun snapshot di {SNAPSHOT_DIR} sebelum menjalankan worker", file=sys.stderr)
+    # Build di proses terpisah agar proses utama tidak memuat torch sebelum fork
+    with ProcessPoolExecutor(max_workers=1) as builder:
+        builder.submit(build_snapshot_main).result()
+    if load_snapshot(SNAPSHOT_DIR, CSV_PATH, MODEL_NAME) is None:
+        raise SystemExit(f"Snapshot di {SNAPSHOT_DIR} gagal dibangun")
+
+def _init_worker(threads: int):
+    """Inisialisasi worker: batasi thread torch lalu muat model dan data Nutrix"""
+    import torch
+    torch.set_num_threads(threads)
+    from . import main  # noqa: F401 (memuat model dan snapshot saat import)
+
+def _text(value) -> Optional[str]:
+    """Nilai teks untuk JSON (NaN dari pandas menjadi None)"""
+    return value if isinstance(value, str) else None
+
+def _to_record(index: int, food_name: str, food_data, with_text: bool) -> Dict:
+    """Ubah hasil pencarian menjadi record JSON"""
+    from . import main as nutrix
+
+    record = {"index": index, "input": food_name, "found": food_data is not None}
+    if food_data is None:
+        return record
+
+    nutrients = {}
+    for col, value in food_data.items():
+        if col in ("clean_name", NDB_COLUMN) or isinstance(value, str):
+            continue
+        value = float(value)
+        if not math.isnan(value):
+            nutrients[col] = value
+
+    record.update({
+        "name": food_data["clean_name"],
+        "category": _text(food_data.iloc[0]),
+        "description": _text(food_data.get("Description")),
+        "ndb_no": int(food_data[NDB_COLUMN]) if NDB_COLUMN in food_data.index else None,
+        "nutrients": nutrients,
+    })
+    if with_text:
+        record["content"] = nutrix.format_nutrition_response(food_data)
+    return record
+
+def _analyze_chunk(chunk: List[Tuple[int, str]], batch_size: int, with_text: bool) -> List[str]:
+    """Analisis satu chunk di worker dan kembalikan baris JSONL"""
+    from . import main as nutrix
+
+    names = [name for _, name in chunk]
+    matches = nutrix.find_closest_foods(names, batch_size=batch_size)
+    return [
+        json.dumps(_to_record(index, name, match, with_text), ensure_ascii=False)
+        for (index, name), match in zip(chunk, matches)
+    ]
+
+def run(input_path: str, output_path: str, input_format: str, field: Optional[str],
+        workers: int, chunk_size: int, batch_size: int, resume: bool, with_text: bool):
+    """Jalankan analisis bulk dari input ke output"""
+    ensure_snapshot()
+
+    skip = count_completed(output_path) if resume else 0
+    if skip:
+        print(f"Melanjutkan dari record ke-{skip}", file=sys.stderr)
+
+    records = read_records(input_path, input_format, field)
+    records = islice(records, skip, None)
+
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    max_pending = workers * 2
+    processed = skip
+    started = time.time()
+
+    with open(output_path, "a" if resume else "w", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(threads,)) as pool:
+        pending = deque()
+
+        def write_next():
+            nonlocal processed
+            lines = pending.popleft().result()
+            out.write("".join(line + "\n" for line in lines))
+            out.flush()
+            processed += len(lines)
+            rate = (processed - skip) / max(time.time() - started, 1e-9)
+            print(f"\r{processed} record ({rate:.0f}/detik)", end="", file=sys.stderr)
+
+        # Jendela chunk in-flight dibatasi agar memori tidak bertambah
+        for chunk in chunked(records, skip, chunk_size):
+            pending.append(pool.submit(_analyze_chunk, chunk, batch_size, with_text))
+            if len(pending) >= max_pending:
+                write_next()
+        while pending:
+            write_next()
+
+    print(f"\nSelesai: {processed} record ditulis ke {output_path}", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description="Analisis nutrisi bulk dari file log makanan")
+    parser.add_argument("input", help="File input CSV atau JSONL")
+    parser.add_argument("output", help="File output JSONL")
+    parser.add_argument("--format", choices=["csv", "jsonl"],
+                        help="Format input (default: dari ekstensi file)")
+    parser.add_argument("--column", help="Kolom CSV / field JSONL berisi nama makanan")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=2048,
+                        help="Jumlah record per tugas worker")
+    parser.add_argument("--batch-size", type=int, default=512,
+                        help="Ukuran batch encoding sentence-transformer")
+    parser.add_argument("--resume", action="store_true",
+                        help="Lanjutkan output yang sudah ada")
+    parser.add_argument("--with-text", action="store_true",
+                        help="Sertakan respons teks terformat seperti endpoint API")
+    args = parser.parse_args()
+
+    input_format = args.format or ("jsonl" if args.input.endswith((".jsonl", ".ndjson")) else "csv")
+    run(args.input, args.output, input_format, args.column, args.workers,
+        args.chunk_size, args.batch_size, args.resume, args.with_text)
+
+if __name__ == "__main__":
+    main()
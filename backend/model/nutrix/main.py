@@ -6,7 +6,7 @@ Menggunakan model sentence transformer untuk menemukan makanan yang paling mirip
 dari database dan mengembalikan informasi nutrisinya.
 
 Komponen Utama:
-1. Database Makanan - Memuat data dari CSV
+1. Database Makanan - Memuat data dari snapshot biner (fallback ke CSV)
 2. Pencarian Semantik - Menggunakan sentence transformers untuk pencocokan nama makanan
 3. Format Nutrisi - Mengorganisir dan memformat data nutrisi berdasarkan kategori
 4. Endpoint API - Menyediakan endpoint HTTP untuk analisis makanan
@@ -16,12 +16,12 @@ from flask import Flask, request, jsonify, render_template
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from sentence_transformers import SentenceTransformer, util
 import torch
 from typing import Dict, Any, Optional, List, Tuple
 import os
 import re
-from ..gemini.main import detect_food_from_image
+from .snapshot import CSV_PATH, MODEL_NAME, SNAPSHOT_DIR, load_snapshot
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -30,7 +30,7 @@ CORS(app)  # Enable CORS for all routes
 model = None  # Instance dari SentenceTransformer
 food_embeddings = None  # Tensor berisi embedding nama makanan
 food_names = None  # List nama makanan original
-df = None  # DataFrame berisi data nutrisi makanan
+df = None  # DataFrame (atau FoodSnapshot) berisi data nutrisi makanan
 
 # Kamus terjemahan sederhana untuk kata-kata umum dalam makanan
 FOOD_TRANSLATIONS = {
@@ -251,9 +251,10 @@ def load_model_and_data():
     """
     Inisialisasi model dan data:
     1. Load model sentence-transformer
-    2. Baca database makanan dari CSV
-    3. Bersihkan nama makanan
-    4. Hitung embedding untuk setiap nama makanan
+    2. Jika snapshot tersedia, petakan data dan embedding dari snapshot
+    3. Jika tidak, baca database makanan dari CSV
+    4. Bersihkan nama makanan
+    5. Hitung embedding untuk setiap nama makanan
     
     Returns:
         bool: True jika berhasil, False jika gagal
@@ -261,12 +262,20 @@ def load_model_and_data():
     global model, food_embeddings, food_names, df
     
     # Load model sentence-transformer
-    model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+    model = SentenceTransformer(MODEL_NAME)
     
     try:
+        # Gunakan snapshot biner jika ada (build: python -m model.nutrix.snapshot)
+        snapshot = load_snapshot(SNAPSHOT_DIR, CSV_PATH, MODEL_NAME)
+        if snapshot is not None:
+            df = snapshot
+            food_names = snapshot.column(snapshot.columns[0])
+            food_embeddings = torch.from_numpy(snapshot.embeddings).to(model.device)
+            print(f"Berhasil memuat {len(food_names)} item makanan dari snapshot")
+            return True
+
         # Baca file CSV dari direktori yang sama
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        df = pd.read_csv(os.path.join(current_dir, 'food.csv'))
+        df = pd.read_csv(CSV_PATH)
         
         # Ambil dan bersihkan nama makanan
         food_names = df.iloc[:, 0].tolist()
@@ -338,6 +347,48 @@ def find_closest_food(food_name: str) -> Optional[Dict[str, Any]]:
         print(f"Error dalam pencarian semantik: {e}")
         return None
 
+def find_closest_foods(food_names: List[str], batch_size: int = 256) -> List[Optional[pd.Series]]:
+    """
+    Versi batch dari find_closest_food untuk banyak nama makanan sekaligus
+
+    Semua terjemahan dari semua input di-encode dalam batch besar, lalu
+    similarity dihitung per potongan query agar memori tetap terbatas.
+    Hasil untuk setiap input sama dengan find_closest_food.
+
+    Args:
+        food_names: Daftar nama makanan (dalam Bahasa Indonesia)
+        batch_size: Ukuran batch untuk encoding dan perhitungan similarity
+
+    Returns:
+        List[Optional[pd.Series]]: Data makanan per input, None jika tidak ditemukan
+    """
+    if model is None or food_embeddings is None or df is None:
+        if not load_model_and_data():
+            return [None] * len(food_names)
+
+    # Kumpulkan semua query beserta indeks input pemiliknya
+    queries = []
+    owners = []
+    for i, food_name in enumerate(food_names):
+        for translation in translate_to_english(food_name):
+            queries.append(clean_food_name(translation))
+            owners.append(i)
+
+    best = [(0, None)] * len(food_names)
+    for start in range(0, len(queries), batch_size):
+        batch = queries[start:start + batch_size]
+        query_embeddings = model.encode(batch, batch_size=batch_size, convert_to_tensor=True)
+        scores, indices = torch.max(util.cos_sim(query_embeddings, food_embeddings), dim=1)
+
+        # Terjemahan pertama dengan skor tertinggi menang, sama seperti find_closest_food
+        for offset, (score, index) in enumerate(zip(scores.tolist(), indices.tolist())):
+            owner = owners[start + offset]
+            if score > best[owner][0]:
+                best[owner] = (score, index)
+
+    # Threshold 0.5 sama dengan pencarian tunggal
+    return [df.iloc[index] if index is not None and score >= 0.5 else None for score, index in best]
+
 def extract_food_name_from_prompt(prompt: str) -> str:
     """
     Ekstrak nama makanan dari prompt pengguna
@@ -461,6 +512,24 @@ Informasi Nutrisi (per 100g):"""
         return f"Error: Tidak dapat memformat data nutrisi untuk {clean_name}"
 
 # konfigurasi gambar di model nutrix
+def nutrition_response(food_name: str) -> str:
+    """
+    Cari makanan di database lalu format informasi nutrisinya
+
+    Args:
+        food_name: Nama makanan hasil ekstraksi prompt atau deteksi gambar
+
+    Returns:
+        str: Informasi nutrisi terformat atau pesan makanan tidak ditemukan
+    """
+    result = find_closest_food(food_name)
+
+    if result is not None:
+        return format_nutrition_response(result)
+    else:
+        return f"""Makanan "{food_name}" tidak ditemukan dalam database.
+Coba masukkan nama makanan yang lebih umum."""
+
 def analyze_with_nutrix(prompt: str, image_data: dict = None) -> str:
     """
     Analisis makanan menggunakan model Nutrix
@@ -480,18 +549,13 @@ def analyze_with_nutrix(prompt: str, image_data: dict = None) -> str:
     try:
         # Jika ada gambar, gunakan Gemini untuk deteksi
         if image_data:
+            # Import di sini agar bulk CLI dan build snapshot tidak butuh GEMINI_API_KEY
+            from ..gemini.main import detect_food_from_image
             food_name = detect_food_from_image(image_data)
         else:
             food_name = extract_food_name_from_prompt(prompt)
         
-        # Cari makanan di database
-        result = find_closest_food(food_name)
-        
-        if result is not None:
-            return format_nutrition_response(result)
-        else:
-            return f"""Makanan "{food_name}" tidak ditemukan dalam database.
-Coba masukkan nama makanan yang lebih umum."""
+        return nutrition_response(food_name)
             
     except Exception as e:
         print(f"Error Nutrix: {str(e)}")
@@ -0,0 +1,246 @@
+"""
+Snapshot Database Makanan
+-------------------------
+Format biner kolumnar untuk food.csv agar worker tidak perlu mem-parsing CSV
+dan menghitung ulang embedding setiap kali start.
+
+Layout direktori snapshot (semua file .npy dibuka dengan memory-map):
+- meta.json           Skema kolom, jumlah baris, info sumber CSV dan model embedding
+- numeric.npy         Blok nutrisi float64 (baris x kolom numerik)
+- strings.bin         String table UTF-8 untuk seluruh kolom teks
+- string_offsets.npy  Offset int64 (kolom teks x (baris + 1)) ke dalam strings.bin
+- string_nulls.npy    Penanda nilai kosong (kolom teks x baris)
+- embeddings.npy      Embedding float32 nama makanan yang sudah dibersihkan
+
+Build:
+    python -m model.nutrix.snapshot
+"""
+
+import json
+import os
+import shutil
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_VERSION = 1
+
+# Lokasi data dan model Nutrix (dipakai juga oleh main.py dan bulk.py)
+MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(CURRENT_DIR, 'food.csv')
+SNAPSHOT_DIR = os.getenv('NUTRIX_SNAPSHOT_DIR', os.path.join(CURRENT_DIR, 'food.snapshot'))
+
+class _RowIndexer:
+    """Pengganti DataFrame.iloc untuk akses satu baris"""
+
+    def __init__(self, snapshot: "FoodSnapshot"):
+        self._snapshot = snapshot
+
+    def __getitem__(self, index: int) -> pd.Series:
+        return self._snapshot.row(index)
+
+class FoodSnapshot:
+    """
+    Database makanan yang dibaca dari snapshot memory-mapped
+
+    Menyediakan antarmuka minimal yang dipakai Nutrix dari DataFrame:
+    `columns`, `len()` dan `iloc[i]` yang mengembalikan pd.Series dengan
+    tipe nilai yang sama seperti hasil pd.read_csv.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        self.columns = [col["name"] for col in self.meta["columns"]]
+        self._kinds = [col["kind"] for col in self.meta["columns"]]
+        self._string_index = {name: i for i, name in enumerate(self.meta["string_columns"])}
+        self._numeric_index = {name: i for i, name in enumerate(self.meta["numeric_columns"])}
+
+        self.numeric = np.load(os.path.join(path, "numeric.npy"), mmap_mode="r")
+        self.string_offsets = np.load(os.path.join(path, "string_offsets.npy"), mmap_mode="r")
+        self.string_nulls = np.load(os.path.join(path, "string_nulls.npy"), mmap_mode="r")
+        # Copy-on-write agar bisa dibungkus tensor tanpa menyalin halaman memori
+        self.embeddings = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="c")
+
+        strings_path = os.path.join(path, "strings.bin")
+        if os.path.getsize(strings_path):
+            self.strings = np.memmap(strings_path, dtype=np.uint8, mode="r")
+        else:
+            self.strings = np.zeros(0, dtype=np.uint8)
+
+        self.iloc = _RowIndexer(self)
+
+    def __len__(self) -> int:
+        return self.meta["rows"]
+
+    def string(self, column: str, index: int):
+        """Ambil satu nilai teks, NaN jika kosong (sama seperti pandas)"""
+        col = self._string_index[column]
+        if self.string_nulls[col, index]:
+            return float("nan")
+        start, end = self.string_offsets[col, index], self.string_offsets[col, index + 1]
+        return bytes(self.strings[start:end]).decode("utf-8")
+
+    def column(self, name: str) -> list:
+        """Ambil seluruh nilai satu kolom sebagai list"""
+        if name in self._string_index:
+            return [self.string(name, i) for i in range(len(self))]
+        return self.numeric[:, self._numeric_index[name]].tolist()
+
+    def row(self, index: int) -> pd.Series:
+        """Bangun satu baris data sebagai pd.Series (dtype object)"""
+        if index < 0:
+            index += len(self)
+        values = []
+        numeric_row = self.numeric[index]
+        for name, kind in zip(self.columns, self._kinds):
+            if kind == "str":
+                values.append(self.string(name, index))
+            elif kind == "int":
+                values.append(np.int64(numeric_row[self._numeric_index[name]]))
+            else:
+                values.append(np.float64(numeric_row[self._numeric_index[name]]))
+        return pd.Series(values, index=self.columns, dtype=object, name=index)
+
+    def nbytes(self) -> int:
+        """
+        Ukuran data makanan di snapshot (dipetakan dari file, bukan memori privat)
+
+        Embedding tidak termasuk; ukurannya dilaporkan terpisah sebagai food_embeddings.
+        """
+        arrays = [self.numeric, self.string_offsets, self.string_nulls, self.strings]
+        return int(sum(array.nbytes for array in arrays))
+
+def build_snapshot(df: pd.DataFrame, embeddings: np.ndarray, out_dir: str,
+                   source_path: str, embedding_model: str):
+    """
+    Tulis DataFrame dan embedding nama makanan ke direktori snapshot
+
+    Args:
+        df: DataFrame hasil pd.read_csv (termasuk kolom clean_name)
+        embeddings: Embedding nama makanan (baris x dimensi)
+        out_dir: Direktori tujuan snapshot
+        source_path: Lokasi CSV sumber (untuk deteksi snapshot usang)
+        embedding_model: Nama model sentence-transformer yang dipakai
+
+    Raises:
+        ValueError: Jika kolom integer tidak bisa disimpan persis di float64
+    """
+    # Tulis ke direktori sementara lalu tukar, agar worker yang sedang
+    # memetakan snapshot lama tidak membaca file yang terpotong
+    tmp_dir = out_dir.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    columns, string_columns, numeric_columns = [], [], []
+    for name, dtype in df.dtypes.items():
+        if pd.api.types.is_integer_dtype(dtype):
+            kind = "int"
+        elif pd.api.types.is_float_dtype(dtype):
+            kind = "float"
+        else:
+            kind = "str"
+        columns.append({"name": name, "kind": kind})
+        (string_columns if kind == "str" else numeric_columns).append(name)
+
+    # float64 dipertahankan: float32 mengubah pembulatan tampilan (mis. 0.85 -> 0.9)
+    numeric = df[numeric_columns].to_numpy(dtype=np.float64)
+    for col in columns:
+        if col["kind"] == "int":
+            original = df[col["name"]].to_numpy()
+            stored = numeric[:, numeric_columns.index(col["name"])]
+            if not np.array_equal(original, stored.astype(np.int64)):
+                raise ValueError(f"Kolom {col['name']} tidak dapat disimpan sebagai float64")
+
+    rows = len(df)
+    blob = bytearray()
+    offsets = np.zeros((len(string_columns), rows + 1), dtype=np.int64)
+    nulls = np.zeros((len(string_columns), rows), dtype=bool)
+    for c, name in enumerate(string_columns):
+        for r, value in enumerate(df[name].tolist()):
+            offsets[c, r] = len(blob)
+            if pd.isna(value):
+                nulls[c, r] = True
+            else:
+                blob.extend(str(value).encode("utf-8"))
+        offsets[c, rows] = len(blob)
+
+    np.save(os.path.join(tmp_dir, "numeric.npy"), np.ascontiguousarray(numeric))
+    np.save(os.path.join(tmp_dir, "string_offsets.npy"), offsets)
+    np.save(os.path.join(tmp_dir, "string_nulls.npy"), nulls)
+    np.save(os.path.join(tmp_dir, "embeddings.npy"), np.ascontiguousarray(embeddings, dtype=np.float32))
+    with open(os.path.join(tmp_dir, "strings.bin"), "wb") as f:
+        f.write(blob)
+
+    stat = os.stat(source_path)
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "rows": rows,
+        "columns": columns,
+        "string_columns": string_columns,
+        "numeric_columns": numeric_columns,
+        "source_size": stat.st_size,
+        "source_mtime": stat.st_mtime,
+        "embedding_model": embedding_model,
+        "embedding_dim": int(embeddings.shape[1]),
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    old_dir = out_dir.rstrip(os.sep) + ".old"
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(out_dir):
+        os.rename(out_dir, old_dir)
+    os.rename(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+def load_snapshot(path: str, source_path: str, embedding_model: str) -> Optional[FoodSnapshot]:
+    """
+    Muat snapshot jika ada dan masih sesuai dengan CSV sumber dan model
+
+    Returns:
+        Optional[FoodSnapshot]: Snapshot, atau None jika harus fallback ke CSV
+    """
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        return None
+    try:
+        snapshot = FoodSnapshot(path)
+    except Exception as e:
+        print(f"Snapshot tidak dapat dibaca, memakai CSV: {e}")
+        return None
+
+    meta = snapshot.meta
+    if meta.get("version") != SNAPSHOT_VERSION or meta.get("embedding_model") != embedding_model:
+        print("Snapshot dibuat dengan versi/model berbeda, memakai CSV")
+        return None
+    if os.path.exists(source_path):
+        stat = os.stat(source_path)
+        if stat.st_size != meta.get("source_size") or stat.st_mtime > meta.get("source_mtime", 0):
+            print("Snapshot lebih lama dari food.csv, memakai CSV (jalankan ulang build snapshot)")
+            return None
+    return snapshot
+
+def main():
+    """
+    Build snapshot dari food.csv memakai model dan pembersih nama Nutrix
+
+    Import modul Nutrix sudah memuat data (dari snapshot yang masih valid,
+    atau dari CSV beserta embedding-nya), sehingga hasil itu dipakai langsung
+    tanpa encoding ulang.
+    """
+    from . import main as nutrix
+
+    if isinstance(nutrix.df, FoodSnapshot):
+        print(f"Snapshot di {SNAPSHOT_DIR} sudah sesuai dengan food.csv dan model")
+        return
+    if nutrix.df is None or nutrix.food_embeddings is None:
+        raise SystemExit("Gagal memuat food.csv, snapshot tidak dibuat")
+
+    embeddings = nutrix.food_embeddings.cpu().numpy()
+    build_snapshot(nutrix.df, embeddings, SNAPSHOT_DIR, CSV_PATH, MODEL_NAME)
+    print(f"Snapshot {len(nutrix.df)} item makanan ditulis ke {SNAPSHOT_DIR}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Single-Flight Request Coalescing
+--------------------------------
+Menggabungkan request identik yang berjalan bersamaan agar hanya satu
+komputasi (pencarian Nutrix atau panggilan Gemini) yang benar-benar dijalankan.
+Request lain dengan key yang sama menunggu dan memakai hasil (atau error)
+dari request pertama.
+
+Contoh:
+    result = inflight.do(("text", "nutrix", "nasi goreng"), lambda: analyze_with_nutrix("nasi goreng"))
+
+Untuk backend ASGI tersedia AsyncSingleFlight dengan counter yang sama.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Hashable
+
+class _Call:
+    """Satu komputasi yang sedang berjalan beserta hasilnya"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Koordinator komputasi in-flight berdasarkan key
+
+    Counter:
+    - calls: jumlah komputasi yang benar-benar dijalankan
+    - collapsed: jumlah request duplikat yang memakai hasil komputasi lain
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.collapsed = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Jalankan fn untuk key, atau tunggu hasil jika key yang sama sedang berjalan
+
+        Args:
+            key: Identitas komputasi (misalnya jenis input, model dan isi ternormalisasi)
+            fn: Fungsi tanpa argumen yang menghasilkan nilai
+
+        Returns:
+            Any: Hasil fn
+
+        Raises:
+            Exception: Error dari fn, diteruskan ke semua request yang menunggu
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self.calls += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict:
+        """Statistik coalescing untuk monitoring"""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "collapsed": self.collapsed,
+                "in_flight": len(self._calls),
+            }
+
+class AsyncSingleFlight:
+    """
+    Versi asyncio dari SingleFlight untuk satu event loop
+
+    Request duplikat menunggu Future milik request pertama tanpa
+    memblokir event loop.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0
+        self.collapsed = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Jalankan coroutine dari fn untuk key, atau tunggu hasil jika sedang berjalan
+
+        Komputasi dijalankan sebagai task tersendiri sehingga request yang
+        terputus (termasuk request pertama) tidak membatalkan request lain.
+
+        Args:
+            key: Identitas komputasi
+            fn: Fungsi tanpa argumen yang mengembalikan awaitable
+
+        Returns:
+            Any: Hasil awaitable
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self.calls += 1
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.collapsed += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        """Statistik coalescing untuk monitoring"""
+        return {
+            "calls": self.calls,
+            "collapsed": self.collapsed,
+            "in_flight": len(self._calls),
+        }
+
+# Instance yang dipakai backend
+inflight = SingleFlight()
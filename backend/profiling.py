@@ -0,0 +1,268 @@
+"""
+Profiling & Memory Introspection
+--------------------------------
+Alat diagnosis untuk worker yang sedang berjalan, dipakai oleh endpoint admin
+di main.py (Flask) dan asgi.py.
+
+Features:
+1. Sampling CPU profiler - Mengambil stack thread yang aktif secara berkala selama
+   N detik, hasil dalam format "folded stacks" (flamegraph.pl, speedscope, inferno)
+2. Snapshot tracemalloc - Alokasi memori terbesar per baris kode
+3. Laporan memori - Ukuran SentenceTransformer, food_embeddings, df, cache
+   dan RSS proses
+
+Environment:
+- ADMIN_TOKEN: Token untuk header X-Admin-Token. Jika tidak diset, endpoint admin nonaktif
+- ADMIN_MAX_SECONDS: Durasi maksimum profiling (default 60)
+"""
+
+import hmac
+import math
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Optional, Tuple
+from model.gemini.cache import response_cache
+from model.nutrix import main as nutrix
+from model.nutrix.snapshot import FoodSnapshot
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+ADMIN_MAX_SECONDS = float(os.getenv("ADMIN_MAX_SECONDS", "60"))
+
+# Batas parameter sampling dan jumlah baris tracemalloc
+MIN_INTERVAL_MS = 1
+MAX_INTERVAL_MS = 1000
+MAX_TRACEMALLOC_LIMIT = 500
+
+# Frame teratas (file, fungsi) thread yang sedang menunggu, bukan memakai CPU:
+# lock/Condition, queue.Queue, event loop dan server yang menunggu I/O, serta
+# worker concurrent.futures yang menunggu tugas (SimpleQueue.get di C)
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+# Hanya satu sesi profiling per worker dalam satu waktu
+_profile_lock = threading.Lock()
+
+class ProfilerBusy(Exception):
+    """Sesi profiling lain sedang berjalan di worker ini"""
+
+def check_admin_token(token: Optional[str]) -> Optional[Tuple[str, int]]:
+    """
+    Validasi token admin
+
+    Returns:
+        Optional[Tuple[str, int]]: (pesan error, status HTTP), None jika valid
+    """
+    if not ADMIN_TOKEN:
+        return "Endpoint admin tidak aktif", 404
+    # Bandingkan sebagai bytes: compare_digest menolak str non-ASCII
+    if not token or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        return "Token admin tidak valid", 401
+    return None
+
+def clamp_seconds(value, default: float) -> float:
+    """Batasi durasi profiling antara 0.1 detik dan ADMIN_MAX_SECONDS"""
+    try:
+        seconds = float(value) if value is not None else default
+    except (TypeError, ValueError):
+        seconds = default
+    if not math.isfinite(seconds):
+        seconds = default
+    return min(max(seconds, 0.1), ADMIN_MAX_SECONDS)
+
+def parse_interval(value, default_ms: float = 5) -> float:
+    """
+    Ubah parameter interval_ms menjadi detik, dibatasi MIN_INTERVAL_MS..MAX_INTERVAL_MS
+
+    Raises:
+        ValueError: Jika nilai bukan angka
+    """
+    try:
+        interval_ms = float(value) if value is not None else default_ms
+    except (TypeError, ValueError):
+        raise ValueError("interval_ms harus berupa angka")
+    if not math.isfinite(interval_ms):
+        raise ValueError("interval_ms harus berupa angka")
+    return min(max(interval_ms, MIN_INTERVAL_MS), MAX_INTERVAL_MS) / 1000
+
+def parse_limit(value, default: int = 30) -> int:
+    """
+    Ubah parameter limit tracemalloc, dibatasi 1..MAX_TRACEMALLOC_LIMIT
+
+    Raises:
+        ValueError: Jika nilai bukan bilangan bulat
+    """
+    try:
+        limit = int(value) if value is not None else default
+    except (TypeError, ValueError):
+        raise ValueError("limit harus berupa bilangan bulat")
+    return min(max(limit, 1), MAX_TRACEMALLOC_LIMIT)
+
+def _frame_label(frame) -> str:
+    """Nama frame untuk folded stacks (tanpa ';' dan spasi di akhir)"""
+    code = frame.f_code
+    label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    return label.replace(";", ":")
+
+def _is_idle(frame) -> bool:
+    """Cek apakah thread sedang menunggu berdasarkan frame teratasnya"""
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES
+
+def sample_cpu(seconds: float, interval: float = 0.005, idle: bool = False) -> str:
+    """
+    Profil CPU statistik untuk thread di proses ini
+
+    Thread yang sedang menunggu (lihat IDLE_FRAMES) dilewati, sehingga hasilnya
+    menggambarkan waktu CPU. Dengan idle=True semua thread ikut tersampel dan
+    hasilnya menjadi profil wall-clock.
+
+    Args:
+        seconds: Lama sampling
+        interval: Jeda antar sampel (detik)
+        idle: Sertakan thread yang sedang menunggu
+
+    Returns:
+        str: Folded stacks, satu baris per stack: "thread;fungsi;fungsi jumlah"
+
+    Raises:
+        ProfilerBusy: Jika sesi profiling lain sedang berjalan
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("Profiling sedang berjalan")
+    try:
+        own_id = threading.get_ident()
+        samples = Counter()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (not idle and _is_idle(frame)):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}").replace(";", ":").replace(" ", "_"))
+                samples[";".join(reversed(stack))] += 1
+            time.sleep(interval)
+        return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+    finally:
+        _profile_lock.release()
+
+def tracemalloc_snapshot(seconds: float, limit: int = 30) -> dict:
+    """
+    Ambil snapshot tracemalloc
+
+    Jika tracemalloc belum aktif, tracing dijalankan selama `seconds` lalu
+    dimatikan lagi, sehingga hanya alokasi selama jendela itu yang terlihat.
+    Untuk melihat seluruh alokasi sejak start, jalankan worker dengan
+    PYTHONTRACEMALLOC=25.
+
+    Returns:
+        dict: Ukuran total dan alokasi terbesar per baris kode
+
+    Raises:
+        ProfilerBusy: Jika sesi profiling lain sedang berjalan
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("Profiling sedang berjalan")
+    try:
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(25)
+            time.sleep(seconds)
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if started_here:
+            tracemalloc.stop()
+    finally:
+        _profile_lock.release()
+
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+    top = []
+    for stat in snapshot.statistics("lineno")[:limit]:
+        frame = stat.traceback[0]
+        top.append({
+            "location": f"{frame.filename}:{frame.lineno}",
+            "size_bytes": stat.size,
+            "count": stat.count,
+        })
+    return {
+        "window_seconds": seconds if started_here else None,
+        "traced_current_bytes": current,
+        "traced_peak_bytes": peak,
+        "top": top,
+    }
+
+def _process_memory() -> dict:
+    """RSS proses dari /proc (Linux), atau puncak RSS dari getrusage"""
+    fields = {"VmRSS": "rss_bytes", "RssAnon": "rss_anon_bytes",
+              "RssFile": "rss_file_bytes", "RssShmem": "rss_shmem_bytes"}
+    memory = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in fields:
+                    memory[fields[key]] = int(value.split()[0]) * 1024
+    except OSError:
+        import resource
+        memory["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return memory
+
+def memory_report(extra: Optional[dict] = None) -> dict:
+    """
+    Laporan footprint memori komponen yang dimuat worker
+
+    Args:
+        extra: Statistik tambahan dari aplikasi (misalnya coalescing)
+
+    Returns:
+        dict: Ukuran (byte) model, embedding, data makanan, cache dan proses
+    """
+    report = {"pid": os.getpid(), "process": _process_memory()}
+
+    model = nutrix.model
+    if model is not None:
+        tensors = list(model.parameters()) + list(model.buffers())
+        report["sentence_transformer"] = {
+            "bytes": sum(t.numel() * t.element_size() for t in tensors),
+            "device": str(model.device),
+        }
+
+    df = nutrix.df
+    mapped = isinstance(df, FoodSnapshot)
+    embeddings = nutrix.food_embeddings
+    if embeddings is not None:
+        report["food_embeddings"] = {
+            "bytes": embeddings.numel() * embeddings.element_size(),
+            "shape": list(embeddings.shape),
+            "device": str(embeddings.device),
+            "memory_mapped": mapped and embeddings.device.type == "cpu",
+        }
+
+    if mapped:
+        report["df"] = {"bytes": df.nbytes(), "rows": len(df), "memory_mapped": True}
+    elif df is not None:
+        report["df"] = {
+            "bytes": int(df.memory_usage(deep=True).sum()),
+            "rows": len(df),
+            "memory_mapped": False,
+        }
+
+    report["caches"] = {"gemini_response_cache": response_cache.memory_usage()}
+    if extra:
+        report["caches"].update(extra)
+    return report
@@ -6,13 +6,17 @@ const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || "http://127.0.0.1:500
 export async function POST(req: NextRequest) {
   try {
     const data = await req.json();                       // Ambil data dari user
-    const { food_name, image_data, model } = data;
+    const { food_name, image_data, model, stream } = data;
 
     // Validate backend connection first
     try {
       // Create FormData for the request(membuat formdata yang akan dikirim ke backend)
       const formData = new FormData();
       formData.append('model', model || 'nutrix');
+      if (stream) {
+        // Minta backend mengirim hasil sebagai Server-Sent Events
+        formData.append('stream', '1');
+      }
       
       if (image_data) {
         // Convert base64 to blob
@@ -29,8 +33,22 @@ export async function POST(req: NextRequest) {
         body: formData,
       });
 
-      // Check if response is JSON
       const contentType = response.headers.get("content-type");
+
+      // Teruskan stream SSE dari backend apa adanya (tanpa buffering)
+      if (contentType && contentType.includes("text/event-stream")) {
+        return new Response(response.body, {
+          status: response.status,
+          headers: {
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache, no-transform",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+          },
+        });
+      }
+
+      // Check if response is JSON
       if (!contentType || !contentType.includes("application/json")) {
         console.error("Backend error: Not JSON response", await response.text());
         return NextResponse.json(